@@ -2,7 +2,8 @@
 Import business events from ICS file to MongoDB
 """
 import asyncio
-from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import AsyncMongoClient
+from pymongo.errors import BulkWriteError
 from dotenv import load_dotenv
 import os
 from pathlib import Path
@@ -13,7 +14,13 @@ ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncMongoClient(
+    mongo_url,
+    maxPoolSize=200,
+    minPoolSize=20,
+    maxIdleTimeMS=60000,
+    compressors='zstd'
+)
 db = client[os.environ['DB_NAME']]
 
 # Business events data from ICS file
@@ -100,39 +107,45 @@ BUSINESS_EVENTS = [
     },
 ]
 
+def _build_event_docs() -> list:
+    """Finalize BUSINESS_EVENTS into Mongo-ready documents once"""
+    now = datetime.utcnow()
+    return [
+        {
+            '_id': str(uuid.uuid4()),
+            'title': event_data['title'],
+            'description': f"Category: {event_data['category']}. More info: {event_data['url']}",
+            'start_date': datetime.fromisoformat(event_data['start_date']),
+            'end_date': datetime.fromisoformat(event_data['end_date']),
+            'location_name': event_data['location_name'],
+            'latitude': event_data['latitude'],
+            'longitude': event_data['longitude'],
+            'category': 'Business Event',
+            'organizer': 'Sarawak Convention Bureau',
+            'image_url': None,
+            'created_at': now,
+            'updated_at': now,
+            'url': event_data['url']
+        }
+        for event_data in BUSINESS_EVENTS
+    ]
+
+# Documents are finalized at module load; the import only ships them
+EVENT_DOCS = _build_event_docs()
+
 async def import_business_events():
     """Import business events"""
     print("Importing business events...")
-    
+
+    # Insert all events in a single bulk write instead of one round trip each
     imported = 0
-    for event_data in BUSINESS_EVENTS:
-        try:
-            event_id = str(uuid.uuid4())
-            
-            event = {
-                '_id': event_id,
-                'title': event_data['title'],
-                'description': f"Category: {event_data['category']}. More info: {event_data['url']}",
-                'start_date': datetime.fromisoformat(event_data['start_date']),
-                'end_date': datetime.fromisoformat(event_data['end_date']),
-                'location_name': event_data['location_name'],
-                'latitude': event_data['latitude'],
-                'longitude': event_data['longitude'],
-                'category': 'Business Event',
-                'organizer': 'Sarawak Convention Bureau',
-                'image_url': None,
-                'created_at': datetime.utcnow(),
-                'updated_at': datetime.utcnow(),
-                'url': event_data['url']
-            }
-            
-            await db.events.insert_one(event)
-            imported += 1
-            print(f"✓ Imported: {event_data['title']}")
-            
-        except Exception as e:
-            print(f"✗ Error importing {event_data['title']}: {e}")
-    
+    try:
+        result = await db.events.insert_many(EVENT_DOCS, ordered=False)
+        imported = len(result.inserted_ids)
+    except BulkWriteError as e:
+        imported = e.details.get('nInserted', 0)
+        print(f"✗ Bulk write errors: {e.details.get('writeErrors')}")
+
     print(f"\nImported {imported} business events")
     
     # Print total events
@@ -143,7 +156,9 @@ async def main():
     try:
         await import_business_events()
     finally:
-        client.close()
+        await client.close()
 
 if __name__ == "__main__":
+    import uvloop
+    uvloop.install()
     asyncio.run(main())
@@ -3,16 +3,22 @@ Data import script for Sarawak Tourism Platform
 This script imports all CSV data into MongoDB
 """
 import asyncio
+import ast
 import csv
+import io
 import os
 import base64
 from pathlib import Path
-from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import AsyncMongoClient
+from pymongo.errors import BulkWriteError
 from dotenv import load_dotenv
 import logging
 from datetime import datetime
-import requests
+import aiohttp
 import hashlib
+import orjson
+import pandas as pd
+from tqdm.asyncio import tqdm
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -24,24 +30,45 @@ load_dotenv(ROOT_DIR / '.env')
 
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncMongoClient(
+    mongo_url,
+    maxPoolSize=200,
+    minPoolSize=20,
+    maxIdleTimeMS=60000,
+    compressors='zstd'
+)
 db = client[os.environ['DB_NAME']]
 
 # Create static images directory
 IMAGES_DIR = ROOT_DIR / 'static' / 'images'
 IMAGES_DIR.mkdir(parents=True, exist_ok=True)
 
-def download_csv(url: str) -> list:
-    """Download and parse CSV from URL"""
+# Flush accumulated documents to MongoDB every BATCH_SIZE rows
+BATCH_SIZE = 1000
+
+async def iter_csv(session: aiohttp.ClientSession, url: str):
+    """Download a CSV from URL and yield its rows one at a time"""
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        decoded_content = response.content.decode('utf-8')
-        csv_reader = csv.DictReader(decoded_content.splitlines())
-        return list(csv_reader)
+        async with session.get(url) as response:
+            response.raise_for_status()
+            decoded_content = await response.text()
     except Exception as e:
         logger.error(f"Error downloading CSV from {url}: {e}")
-        return []
+        return
+
+    for row in csv.DictReader(io.StringIO(decoded_content)):
+        yield row
+
+async def bulk_insert(collection, docs: list) -> int:
+    """Insert documents in a single unordered bulk write"""
+    if not docs:
+        return 0
+    try:
+        result = await collection.insert_many(docs, ordered=False)
+        return len(result.inserted_ids)
+    except BulkWriteError as e:
+        logger.error(f"Bulk write errors: {e.details.get('writeErrors')}")
+        return e.details.get('nInserted', 0)
 
 def save_base64_image(base64_str: str, filename: str) -> str:
     """Save base64 image to file and return URL"""
@@ -51,60 +78,65 @@ def save_base64_image(base64_str: str, filename: str) -> str:
         
         # Extract image data
         image_data = base64_str.split(',')[1] if ',' in base64_str else base64_str
-        
-        # Generate unique filename
-        file_hash = hashlib.md5(image_data.encode()).hexdigest()[:8]
+
+        # Decode once and hash the raw bytes (blake2b is faster than md5)
+        raw = base64.b64decode(image_data)
+        file_hash = hashlib.blake2b(raw, digest_size=4).hexdigest()
         ext = 'jpg'  # Default extension
         if 'png' in base64_str:
             ext = 'png'
         elif 'jpeg' in base64_str or 'jpg' in base64_str:
             ext = 'jpg'
-        
+
         filename = f"{filename}_{file_hash}.{ext}"
         filepath = IMAGES_DIR / filename
-        
-        # Save image
-        with open(filepath, 'wb') as f:
-            f.write(base64.b64decode(image_data))
-        
+
+        # Save image unless an identical file is already on disk
+        if not filepath.exists():
+            with open(filepath, 'wb') as f:
+                f.write(raw)
+
         # Return URL path
         return f"/static/images/{filename}"
     except Exception as e:
         logger.error(f"Error saving image {filename}: {e}")
         return None
 
-async def import_attractions():
+async def import_attractions(session: aiohttp.ClientSession):
     """Import clusters/attractions data"""
     logger.info("Importing attractions data...")
     
     # Download CSV
     url = "https://customer-assets.emergentagent.com/job_discover-sarawak/artifacts/z0wct5ev_clusters_rows.csv"
-    rows = download_csv(url)
-    
-    if not rows:
-        logger.error("No data to import for attractions")
-        return
-    
-    # Clear existing collection
-    await db.attractions.delete_many({})
-    
+
+    # Drop the collection (indexes included) so the bulk load pays no
+    # per-insert index maintenance; indexes are rebuilt after the load
+    await db.attractions.drop()
+
+    now = datetime.utcnow()
     imported_count = 0
-    for row in rows:
+    docs = []
+    async for row in tqdm(iter_csv(session, url), desc="attractions", unit="row"):
         try:
             # Process image
             image_url = row.get('image')
             if image_url and image_url.startswith('data:image'):
-                # Convert base64 to file
-                image_url = save_base64_image(image_url, f"attraction_{row.get('id', 'unknown')}")
-            
-            # Parse categories
+                # Convert base64 to file off the event loop so the decode and
+                # disk write overlap with in-flight Mongo batches
+                image_url = await asyncio.to_thread(
+                    save_base64_image, image_url, f"attraction_{row.get('id', 'unknown')}")
+
+            # Parse categories: orjson's C parser handles well-formed JSON
+            # arrays; literal_eval covers the single-quoted variants
             category = row.get('category', '[]')
             try:
-                import json
-                categories = json.loads(category.replace("'", '"'))
-            except:
-                categories = [category] if category else []
-            
+                categories = orjson.loads(category)
+            except orjson.JSONDecodeError:
+                try:
+                    categories = list(ast.literal_eval(category))
+                except (ValueError, SyntaxError):
+                    categories = [category] if category else []
+
             # Create attraction document
             attraction = {
                 '_id': row.get('id'),
@@ -115,145 +147,178 @@ async def import_attractions():
                 'latitude': float(row.get('latitude', 0)) if row.get('latitude') else None,
                 'longitude': float(row.get('longitude', 0)) if row.get('longitude') else None,
                 'image_url': image_url,
-                'created_at': datetime.utcnow(),
-                'updated_at': datetime.utcnow()
+                'created_at': now,
+                'updated_at': now
             }
-            
-            await db.attractions.insert_one(attraction)
-            imported_count += 1
-            
+
+            docs.append(attraction)
+
         except Exception as e:
             logger.error(f"Error importing attraction {row.get('id')}: {e}")
             continue
-    
+
+        if len(docs) >= BATCH_SIZE:
+            imported_count += await bulk_insert(db.attractions, docs)
+            docs = []
+
+    imported_count += await bulk_insert(db.attractions, docs)
+
+    if not imported_count:
+        logger.error("No data to import for attractions")
+        return
+
     # Create indexes
     await db.attractions.create_index([("categories", 1)])
     await db.attractions.create_index([("location", 1)])
     
     logger.info(f"Imported {imported_count} attractions")
 
-async def import_events():
+async def import_events(session: aiohttp.ClientSession):
     """Import events data"""
     logger.info("Importing events data...")
     
     # Download CSV
     url = "https://customer-assets.emergentagent.com/job_discover-sarawak/artifacts/qxxync66_events_rows.csv"
-    rows = download_csv(url)
-    
-    if not rows:
-        logger.error("No data to import for events")
-        return
-    
-    # Clear existing collection
-    await db.events.delete_many({})
-    
+
+    # Drop the collection (indexes included) so the bulk load pays no
+    # per-insert index maintenance; indexes are rebuilt after the load
+    await db.events.drop()
+
+    now = datetime.utcnow()
+    _from_iso = datetime.fromisoformat
+    _date_cache = {}
     imported_count = 0
-    for row in rows:
+    docs = []
+    async for row in tqdm(iter_csv(session, url), desc="events", unit="row"):
         try:
             # Process image
             image_url = row.get('image_url')
             if image_url and image_url.startswith('data:image'):
-                image_url = save_base64_image(image_url, f"event_{row.get('id', 'unknown')}")
-            
+                image_url = await asyncio.to_thread(
+                    save_base64_image, image_url, f"event_{row.get('id', 'unknown')}")
+
             # Create event document
             event = {
                 '_id': row.get('id'),
                 'title': row.get('title'),
                 'description': row.get('description'),
-                'start_date': datetime.fromisoformat(row.get('start_date').replace('+00', '')) if row.get('start_date') else None,
-                'end_date': datetime.fromisoformat(row.get('end_date').replace('+00', '')) if row.get('end_date') else None,
+                'start_date': _date_cache.setdefault(row['start_date'], _from_iso(row['start_date'].replace('+00', ''))) if row.get('start_date') else None,
+                'end_date': _date_cache.setdefault(row['end_date'], _from_iso(row['end_date'].replace('+00', ''))) if row.get('end_date') else None,
                 'location_name': row.get('location_name'),
                 'latitude': float(row.get('latitude', 0)) if row.get('latitude') else None,
                 'longitude': float(row.get('longitude', 0)) if row.get('longitude') else None,
                 'category': row.get('category'),
                 'image_url': image_url,
                 'organizer': row.get('organizer'),
-                'created_at': datetime.utcnow(),
-                'updated_at': datetime.utcnow()
+                'created_at': now,
+                'updated_at': now
             }
-            
-            await db.events.insert_one(event)
-            imported_count += 1
-            
+
+            docs.append(event)
+
         except Exception as e:
             logger.error(f"Error importing event {row.get('id')}: {e}")
             continue
-    
+
+        if len(docs) >= BATCH_SIZE:
+            imported_count += await bulk_insert(db.events, docs)
+            docs = []
+
+    imported_count += await bulk_insert(db.events, docs)
+
+    if not imported_count:
+        logger.error("No data to import for events")
+        return
+
     # Create indexes
     await db.events.create_index([("start_date", 1)])
     await db.events.create_index([("category", 1)])
+    # Compound index covering the category filter + start_date sort in /api/events
+    await db.events.create_index([("category", 1), ("start_date", 1)])
     
     logger.info(f"Imported {imported_count} events")
 
-async def import_analytics():
+async def import_analytics(session: aiohttp.ClientSession):
     """Import visitor analytics data"""
     logger.info("Importing visitor analytics data...")
     
     # Download CSV
     url = "https://customer-assets.emergentagent.com/job_discover-sarawak/artifacts/kov15g3r_visitor_analytics_rows.csv"
-    rows = download_csv(url)
-    
-    if not rows:
-        logger.error("No data to import for analytics")
+    try:
+        async with session.get(url) as response:
+            response.raise_for_status()
+            decoded_content = await response.text()
+    except Exception as e:
+        logger.error(f"Error downloading CSV from {url}: {e}")
         return
-    
-    # Clear existing collection
-    await db.visitor_analytics.delete_many({})
-    
+
+    # Drop the collection (indexes included) so the bulk load pays no
+    # per-insert index maintenance; indexes are rebuilt after the load
+    await db.visitor_analytics.drop()
+
+    # Vectorized parse and type coercion instead of a per-row Python loop
+    df = pd.read_csv(io.StringIO(decoded_content))
+    df['year'] = pd.to_numeric(df['year'], errors='coerce').fillna(0).astype('int64')
+    df['month'] = pd.to_numeric(df['month'], errors='coerce').fillna(0).astype('int64')
+    df['count'] = pd.to_numeric(df.get('count'), errors='coerce').fillna(0).astype('int64')
+    df['country'] = df['country'].astype(str).str.strip()
+    df['visitor_type'] = df['visitor_type'].astype(str).str.strip()
+    docs = df[['year', 'month', 'country', 'visitor_type', 'count']].to_dict('records')
+
     imported_count = 0
-    for row in rows:
-        try:
-            analytics = {
-                'year': int(row.get('year')),
-                'month': int(row.get('month')),
-                'country': row.get('country'),
-                'visitor_type': row.get('visitor_type'),
-                'count': int(row.get('count', 0))
-            }
-            
-            await db.visitor_analytics.insert_one(analytics)
-            imported_count += 1
-            
-        except Exception as e:
-            logger.error(f"Error importing analytics: {e}")
-            continue
-    
+    for i in range(0, len(docs), BATCH_SIZE):
+        imported_count += await bulk_insert(db.visitor_analytics, docs[i:i + BATCH_SIZE])
+
+    if not imported_count:
+        logger.error("No data to import for analytics")
+        return
+
     # Create indexes
     await db.visitor_analytics.create_index([("year", 1), ("month", 1)])
     await db.visitor_analytics.create_index([("country", 1)])
+    # Compound index matching the /api/analytics filter combinations
+    await db.visitor_analytics.create_index([("year", 1), ("month", 1), ("country", 1), ("visitor_type", 1)])
     
     logger.info(f"Imported {imported_count} analytics records")
 
-async def import_holidays():
+async def import_holidays(session: aiohttp.ClientSession):
     """Import public holidays data"""
     logger.info("Importing public holidays data...")
     
     # Download CSV
     url = "https://customer-assets.emergentagent.com/job_discover-sarawak/artifacts/luc2irri_public_holidays_rows.csv"
-    rows = download_csv(url)
-    
-    if not rows:
-        logger.error("No data to import for holidays")
-        return
-    
-    # Clear existing collection
-    await db.public_holidays.delete_many({})
-    
+
+    # Drop the collection (indexes included) so the bulk load pays no
+    # per-insert index maintenance; indexes are rebuilt after the load
+    await db.public_holidays.drop()
+
+    _from_iso = datetime.fromisoformat
+    _date_cache = {}
     imported_count = 0
-    for row in rows:
+    docs = []
+    async for row in tqdm(iter_csv(session, url), desc="holidays", unit="row"):
         try:
             holiday = {
-                'date': datetime.fromisoformat(row.get('date')),
+                'date': _date_cache.setdefault(row['date'], _from_iso(row['date'])),
                 'name': row.get('name')
             }
-            
-            await db.public_holidays.insert_one(holiday)
-            imported_count += 1
-            
+
+            docs.append(holiday)
+
         except Exception as e:
             logger.error(f"Error importing holiday: {e}")
             continue
-    
+
+        if len(docs) >= BATCH_SIZE:
+            imported_count += await bulk_insert(db.public_holidays, docs)
+            docs = []
+
+    imported_count += await bulk_insert(db.public_holidays, docs)
+
+    if not imported_count:
+        logger.error("No data to import for holidays")
+        return
+
     # Create index
     await db.public_holidays.create_index([("date", 1)])
     
@@ -264,12 +329,16 @@ async def main():
     logger.info("Starting data import...")
     
     try:
-        # Import all data
-        await import_attractions()
-        await import_events()
-        await import_analytics()
-        await import_holidays()
-        
+        # Run the four independent imports concurrently over one HTTP session,
+        # so TCP + TLS setup against the assets host is paid once, not per CSV
+        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=30)) as session:
+            await asyncio.gather(
+                import_attractions(session),
+                import_events(session),
+                import_analytics(session),
+                import_holidays(session)
+            )
+
         logger.info("Data import completed successfully!")
         
         # Print statistics
@@ -289,7 +358,9 @@ async def main():
     except Exception as e:
         logger.error(f"Error during import: {e}")
     finally:
-        client.close()
+        await client.close()
 
 if __name__ == "__main__":
+    import uvloop
+    uvloop.install()
     asyncio.run(main())
@@ -1,17 +1,24 @@
-from fastapi import FastAPI, APIRouter, Query, HTTPException, Cookie, Response, Depends
+from fastapi import FastAPI, APIRouter, Query, HTTPException, Cookie, Request, Response, Depends
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import AsyncMongoClient, ReturnDocument, WriteConcern
+import asyncio
 import os
 import logging
+import time
 from pathlib import Path
 from pydantic import BaseModel, Field
 from typing import List, Optional
 import uuid
+from secrets import token_urlsafe
+from contextlib import asynccontextmanager
 from datetime import datetime, timezone, timedelta
 from emergentintegrations.llm.chat import LlmChat, UserMessage
 import httpx
+import orjson
+import redis.asyncio as redis
 
 
 ROOT_DIR = Path(__file__).parent
@@ -19,11 +26,65 @@ load_dotenv(ROOT_DIR / '.env')
 
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncMongoClient(
+    mongo_url,
+    maxPoolSize=200,
+    minPoolSize=20,
+    maxIdleTimeMS=60000,
+    compressors='zstd'
+)
 db = client[os.environ['DB_NAME']]
 
-# Create the main app without a prefix
-app = FastAPI()
+# Redis connection (caches session lookups so auth skips Mongo)
+redis_client = redis.from_url(
+    os.environ.get('REDIS_URL', 'redis://localhost:6379/0'),
+    decode_responses=True
+)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Shared outbound HTTP client so auth calls reuse keep-alive connections
+    # instead of paying a TLS handshake per request
+    app.state.http = httpx.AsyncClient(
+        timeout=10.0,
+        limits=httpx.Limits(max_keepalive_connections=20, keepalive_expiry=30)
+    )
+    # In-process client for /api/batch: sub-requests dispatch straight into
+    # the ASGI app, no socket involved
+    app.state.self_http = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://batch"
+    )
+    # Index creation is idempotent and the builds are independent, so
+    # run them all concurrently instead of serializing round trips
+    await asyncio.gather(
+        # Drives the $match + $lookup in get_user_favorites, and makes
+        # (user_id, attraction_id) pairs unique
+        db.favorites.create_index([("user_id", 1), ("attraction_id", 1)], unique=True),
+        # Rate-limit counts and itinerary history both filter on user_id
+        # and sort/range on created_at
+        db.itineraries.create_index([("user_id", 1), ("created_at", -1)]),
+        # Drive the session → user join in get_current_user
+        db.user_sessions.create_index("session_token", unique=True),
+        # Let Mongo reap expired sessions instead of request handlers
+        db.user_sessions.create_index("expires_at", expireAfterSeconds=0),
+        db.users.create_index("user_id", unique=True),
+        # create_session looks users up by email
+        db.users.create_index("email", unique=True),
+        # Category filters on /attractions and the itinerary context query
+        db.attractions.create_index("categories"),
+        # Covers the category filter + start_date sort in /events
+        db.events.create_index([("category", 1), ("start_date", 1)]),
+        # /holidays sorts on date and range-filters by year
+        db.public_holidays.create_index("date"),
+    )
+    yield
+    await app.state.http.aclose()
+    await app.state.self_http.aclose()
+    await redis_client.aclose()
+    await client.close()
+
+# Create the main app without a prefix; orjson serializes responses in C
+app = FastAPI(default_response_class=ORJSONResponse, lifespan=lifespan)
 
 # Mount static files for images
 static_dir = ROOT_DIR / "static"
@@ -81,7 +142,7 @@ class PublicHoliday(BaseModel):
     name: str
 
 class Favorite(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()), alias='_id')
+    id: str = Field(default_factory=lambda: token_urlsafe(16), alias='_id')
     user_id: str
     attraction_id: str
     created_at: datetime = Field(default_factory=datetime.utcnow)
@@ -93,6 +154,10 @@ class FavoriteCreate(BaseModel):
     user_id: str
     attraction_id: str
 
+class BatchSubRequest(BaseModel):
+    method: str = "GET"
+    path: str = Field(..., description="API path relative to /api, e.g. /health")
+
 class ItineraryRequest(BaseModel):
     interests: List[str] = Field(..., description="List of interests (Culture, Adventure, Nature, Foods, Festivals)")
     duration: int = Field(..., description="Duration in days (1, 3, 5, 7)")
@@ -100,7 +165,7 @@ class ItineraryRequest(BaseModel):
     user_id: Optional[str] = None
 
 class ItineraryResponse(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()), alias='_id')
+    id: str = Field(default_factory=lambda: token_urlsafe(16), alias='_id')
     user_id: Optional[str] = None
     itinerary: str
     interests: List[str]
@@ -135,7 +200,15 @@ class SessionDataResponse(BaseModel):
 
 # ============ AUTHENTICATION HELPER FUNCTIONS ============
 
-async def get_session_token_from_request(
+# Cached session→user entries live at most this long (well under the
+# 7-day session lifetime, so revocations propagate quickly)
+SESSION_CACHE_TTL = 300
+
+# Itinerary context data (attractions/events/holidays) only changes when
+# an import script runs
+REFERENCE_CACHE_TTL = 600
+
+def get_session_token_from_request(
     session_token: Optional[str] = Cookie(None),
     authorization: Optional[str] = None
 ) -> Optional[str]:
@@ -153,39 +226,49 @@ async def get_current_user(
     authorization: Optional[str] = None
 ) -> Optional[User]:
     """Get current authenticated user from session token"""
-    token = await get_session_token_from_request(session_token, authorization)
+    token = get_session_token_from_request(session_token, authorization)
     
     if not token:
         return None
-    
-    # Find session
-    session = await db.user_sessions.find_one(
-        {"session_token": token},
-        {"_id": 0}
-    )
-    
-    if not session:
+
+    # Fast path: cached session→user mapping, one Redis GET instead of
+    # two Mongo queries
+    cached_user = await redis_client.get(f"sess:{token}")
+    if cached_user:
+        return User(**orjson.loads(cached_user))
+
+    # Cache miss: join session → user server-side in one round trip
+    pipeline = [
+        {"$match": {"session_token": token}},
+        {"$lookup": {
+            "from": "users",
+            "localField": "user_id",
+            "foreignField": "user_id",
+            "as": "user"
+        }},
+        {"$unwind": "$user"},
+        {"$project": {"_id": 0, "expires_at": 1, "user": 1}}
+    ]
+    cursor = await db.user_sessions.aggregate(pipeline)
+    docs = await cursor.to_list(1)
+
+    if not docs:
         return None
-    
+
     # Check if session is expired
-    expires_at = session["expires_at"]
+    expires_at = docs[0]["expires_at"]
     if expires_at.tzinfo is None:
         expires_at = expires_at.replace(tzinfo=timezone.utc)
-    
+
     if expires_at < datetime.now(timezone.utc):
-        # Session expired, delete it
-        await db.user_sessions.delete_one({"session_token": token})
+        # The TTL index on expires_at removes the document; the reaper runs
+        # roughly once a minute, so this check covers the race window
         return None
-    
-    # Get user
-    user_doc = await db.users.find_one(
-        {"user_id": session["user_id"]},
-        {"_id": 0}
-    )
-    
-    if not user_doc:
-        return None
-    
+
+    user_doc = docs[0]["user"]
+    user_doc.pop("_id", None)
+
+    await redis_client.set(f"sess:{token}", orjson.dumps(user_doc).decode(), ex=SESSION_CACHE_TTL)
     return User(**user_doc)
 
 
@@ -193,26 +276,28 @@ async def get_current_user(
 
 @api_router.post("/auth/session")
 async def create_session(
+    request: Request,
     session_id: str = Query(..., description="Session ID from OAuth callback"),
     response: Response = None
 ):
     """Exchange session_id for session_token and user data"""
     try:
-        # Call Emergent Auth API to get user data
-        async with httpx.AsyncClient() as client:
-            auth_response = await client.get(
-                "https://demobackend.emergentagent.com/auth/v1/env/oauth/session-data",
-                headers={"X-Session-ID": session_id},
-                timeout=10.0
-            )
-            
-            if auth_response.status_code != 200:
-                raise HTTPException(status_code=401, detail="Invalid session ID")
-            
-            user_data = auth_response.json()
-        
+        # Call Emergent Auth API to get user data over the shared client
+        auth_response = await request.app.state.http.get(
+            "https://demobackend.emergentagent.com/auth/v1/env/oauth/session-data",
+            headers={"X-Session-ID": session_id}
+        )
+
+        if auth_response.status_code != 200:
+            raise HTTPException(status_code=401, detail="Invalid session ID")
+
+        user_data = auth_response.json()
+
+        # One clock read per request; reused for every timestamp below
+        now = datetime.now(timezone.utc)
+
         # Generate custom user_id
-        user_id = f"user_{uuid.uuid4().hex[:12]}"
+        user_id = f"user_{token_urlsafe(9)}"
         
         # Check if user already exists
         existing_user = await db.users.find_one(
@@ -229,7 +314,7 @@ async def create_session(
                 "email": user_data["email"],
                 "name": user_data["name"],
                 "picture": user_data.get("picture"),
-                "created_at": datetime.now(timezone.utc)
+                "created_at": now
             }
             await db.users.insert_one(new_user)
         
@@ -238,10 +323,15 @@ async def create_session(
         session = {
             "user_id": user_id,
             "session_token": session_token,
-            "expires_at": datetime.now(timezone.utc) + timedelta(days=7),
-            "created_at": datetime.now(timezone.utc)
+            "expires_at": now + timedelta(days=7),
+            "created_at": now
         }
-        await db.user_sessions.insert_one(session)
+        # Unacknowledged write: losing a session row in a crash only forces
+        # a re-login, and the insert is off the login critical path. Users
+        # and itineraries keep the default acknowledged write concern.
+        await db.user_sessions.with_options(
+            write_concern=WriteConcern(w=0)
+        ).insert_one(session)
         
         # Set httpOnly cookie
         response.set_cookie(
@@ -287,11 +377,12 @@ async def logout(
     authorization: Optional[str] = None
 ):
     """Logout user"""
-    token = await get_session_token_from_request(session_token, authorization)
+    token = get_session_token_from_request(session_token, authorization)
     
     if token:
-        # Delete session from database
+        # Delete session from database and evict the cached entry
         await db.user_sessions.delete_one({"session_token": token})
+        await redis_client.delete(f"sess:{token}")
     
     # Clear cookie
     response.delete_cookie(key="session_token", path="/")
@@ -299,6 +390,34 @@ async def logout(
     return {"message": "Logged out successfully"}
 
 
+# ============ RESPONSE CACHE ============
+
+# Attractions, events and holidays only change when an import script runs,
+# so their responses are cached in-process for a short TTL. Keys include
+# user-controlled query parameters (location regexes, date ranges), so the
+# cache is bounded: expired entries are purged on write and the oldest
+# entry is evicted once the cap is reached.
+CACHE_TTL_SECONDS = 300
+CACHE_MAX_ENTRIES = 256
+_response_cache = {}
+
+def cache_get(key):
+    entry = _response_cache.get(key)
+    if entry and entry[0] > time.monotonic():
+        return entry[1]
+    return None
+
+def cache_set(key, value):
+    now = time.monotonic()
+    if len(_response_cache) >= CACHE_MAX_ENTRIES:
+        for k in [k for k, (expires, _) in _response_cache.items() if expires <= now]:
+            del _response_cache[k]
+        if len(_response_cache) >= CACHE_MAX_ENTRIES:
+            # Still full of live entries: drop the one closest to expiry
+            del _response_cache[min(_response_cache, key=lambda k: _response_cache[k][0])]
+    _response_cache[key] = (now + CACHE_TTL_SECONDS, value)
+
+
 # ============ ROUTES ============
 
 @api_router.get("/")
@@ -306,13 +425,18 @@ async def root():
     return {"message": "Discover Sarawak API", "version": "1.0.0"}
 
 # Attractions endpoints
-@api_router.get("/attractions", response_model=List[Attraction])
+@api_router.get("/attractions")
 async def get_attractions(
     category: Optional[str] = Query(None, description="Filter by category (Culture, Adventure, Nature, Foods, Festivals, Homestays)"),
     location: Optional[str] = Query(None, description="Filter by location"),
     limit: int = Query(1000, le=1000)
 ):
     """Get all attractions with optional filtering"""
+    cache_key = ('attractions', category, location, limit)
+    cached = cache_get(cache_key)
+    if cached is not None:
+        return cached
+
     query = {}
     
     if category:
@@ -321,8 +445,10 @@ async def get_attractions(
     if location:
         query['location'] = {'$regex': location, '$options': 'i'}
     
-    attractions = await db.attractions.find(query).limit(limit).to_list(limit)
-    return [Attraction(**attraction) for attraction in attractions]
+    # Mongo already returns dicts; skip per-document Pydantic validation
+    result = await db.attractions.find(query).limit(limit).to_list(limit)
+    cache_set(cache_key, result)
+    return result
 
 @api_router.get("/attractions/{attraction_id}", response_model=Attraction)
 async def get_attraction(attraction_id: str):
@@ -333,7 +459,7 @@ async def get_attraction(attraction_id: str):
     return Attraction(**attraction)
 
 # Events endpoints
-@api_router.get("/events", response_model=List[Event])
+@api_router.get("/events")
 async def get_events(
     category: Optional[str] = Query(None, description="Filter by category (Festival, Adventure)"),
     start_date: Optional[datetime] = Query(None, description="Filter events starting from this date"),
@@ -341,6 +467,11 @@ async def get_events(
     limit: int = Query(100, le=1000)
 ):
     """Get all events with optional filtering"""
+    cache_key = ('events', category, start_date, end_date, limit)
+    cached = cache_get(cache_key)
+    if cached is not None:
+        return cached
+
     query = {}
     
     if category:
@@ -355,8 +486,10 @@ async def get_events(
         else:
             query['start_date'] = {'$lte': end_date}
     
-    events = await db.events.find(query).sort('start_date', 1).limit(limit).to_list(limit)
-    return [Event(**event) for event in events]
+    # Mongo already returns dicts; skip per-document Pydantic validation
+    result = await db.events.find(query).sort('start_date', 1).limit(limit).to_list(limit)
+    cache_set(cache_key, result)
+    return result
 
 @api_router.get("/events/{event_id}", response_model=Event)
 async def get_event(event_id: str):
@@ -367,16 +500,19 @@ async def get_event(event_id: str):
     return Event(**event)
 
 # Visitor analytics endpoints
-@api_router.get("/analytics", response_model=List[VisitorAnalytics])
+@api_router.get("/analytics")
 async def get_analytics(
     year: Optional[int] = Query(None, description="Filter by year"),
     month: Optional[int] = Query(None, description="Filter by month"),
     country: Optional[str] = Query(None, description="Filter by country"),
-    visitor_type: Optional[str] = Query(None, description="Filter by visitor type (Domestic, International)")
+    visitor_type: Optional[str] = Query(None, description="Filter by visitor type (Domestic, International)"),
+    group_by: Optional[str] = Query(None, description="Aggregate totals by field (year, month, country, visitor_type)"),
+    limit: int = Query(1000, le=10000),
+    offset: int = Query(0, ge=0)
 ):
-    """Get visitor analytics data"""
+    """Get visitor analytics data, optionally aggregated server-side"""
     query = {}
-    
+
     if year:
         query['year'] = year
     if month:
@@ -385,9 +521,21 @@ async def get_analytics(
         query['country'] = country
     if visitor_type:
         query['visitor_type'] = visitor_type
-    
-    analytics = await db.visitor_analytics.find(query).to_list(10000)
-    return [VisitorAnalytics(**record) for record in analytics]
+
+    # Aggregate in Mongo instead of shipping raw rows to the client
+    if group_by:
+        if group_by not in ('year', 'month', 'country', 'visitor_type'):
+            raise HTTPException(status_code=400, detail="group_by must be one of: year, month, country, visitor_type")
+        pipeline = [
+            {'$match': query},
+            {'$group': {'_id': f'${group_by}', 'total': {'$sum': '$count'}}},
+            {'$sort': {'_id': 1}}
+        ]
+        cursor = await db.visitor_analytics.aggregate(pipeline)
+        return await cursor.to_list(10000)
+
+    # Mongo already returns dicts; skip per-document Pydantic validation
+    return await db.visitor_analytics.find(query, {'_id': 0}).skip(offset).limit(limit).to_list(limit)
 
 @api_router.get("/analytics/summary")
 async def get_analytics_summary():
@@ -403,7 +551,8 @@ async def get_analytics_summary():
             }},
             {'$sort': {'_id': 1}}
         ]
-        yearly_stats = await db.visitor_analytics.aggregate(yearly_pipeline).to_list(20)
+        yearly_cursor = await db.visitor_analytics.aggregate(yearly_pipeline)
+        yearly_stats = await yearly_cursor.to_list(20)
         
         # Get available years
         years = [item['_id'] for item in yearly_stats]
@@ -415,7 +564,8 @@ async def get_analytics_summary():
             {'$sort': {'total': -1}},
             {'$limit': 10}
         ]
-        top_countries = await db.visitor_analytics.aggregate(top_countries_pipeline).to_list(10)
+        top_countries_cursor = await db.visitor_analytics.aggregate(top_countries_pipeline)
+        top_countries = await top_countries_cursor.to_list(10)
         
         # Get total records count
         total_records = await db.visitor_analytics.count_documents({})
@@ -445,7 +595,8 @@ async def get_yearly_analytics(year: int):
             }},
             {'$sort': {'_id': 1}}
         ]
-        monthly_stats = await db.visitor_analytics.aggregate(monthly_pipeline).to_list(12)
+        monthly_cursor = await db.visitor_analytics.aggregate(monthly_pipeline)
+        monthly_stats = await monthly_cursor.to_list(12)
         
         # Top countries for the year
         countries_pipeline = [
@@ -454,7 +605,8 @@ async def get_yearly_analytics(year: int):
             {'$sort': {'total': -1}},
             {'$limit': 15}
         ]
-        top_countries = await db.visitor_analytics.aggregate(countries_pipeline).to_list(15)
+        countries_cursor = await db.visitor_analytics.aggregate(countries_pipeline)
+        top_countries = await countries_cursor.to_list(15)
         
         # Domestic sources
         domestic_pipeline = [
@@ -462,7 +614,8 @@ async def get_yearly_analytics(year: int):
             {'$group': {'_id': '$country', 'total': {'$sum': '$count'}}},
             {'$sort': {'total': -1}}
         ]
-        domestic_sources = await db.visitor_analytics.aggregate(domestic_pipeline).to_list(10)
+        domestic_cursor = await db.visitor_analytics.aggregate(domestic_pipeline)
+        domestic_sources = await domestic_cursor.to_list(10)
         
         # Year totals
         total_pipeline = [
@@ -474,7 +627,8 @@ async def get_yearly_analytics(year: int):
                 'international': {'$sum': {'$cond': [{'$eq': ['$visitor_type', 'International']}, '$count', 0]}}
             }}
         ]
-        totals = await db.visitor_analytics.aggregate(total_pipeline).to_list(1)
+        totals_cursor = await db.visitor_analytics.aggregate(total_pipeline)
+        totals = await totals_cursor.to_list(1)
         year_total = totals[0] if totals else {'total': 0, 'domestic': 0, 'international': 0}
         
         return {
@@ -510,7 +664,8 @@ async def compare_years(
                 }},
                 {'$sort': {'_id': 1}}
             ]
-            return await db.visitor_analytics.aggregate(pipeline).to_list(12)
+            cursor = await db.visitor_analytics.aggregate(pipeline)
+            return await cursor.to_list(12)
         
         year1_data = await get_year_data(year1)
         year2_data = await get_year_data(year2)
@@ -531,11 +686,16 @@ async def compare_years(
         raise HTTPException(status_code=500, detail=str(e))
 
 # Public holidays endpoints
-@api_router.get("/holidays", response_model=List[PublicHoliday])
+@api_router.get("/holidays")
 async def get_holidays(
     year: Optional[int] = Query(None, description="Filter by year")
 ):
     """Get public holidays"""
+    cache_key = ('holidays', year)
+    cached = cache_get(cache_key)
+    if cached is not None:
+        return cached
+
     query = {}
     
     if year:
@@ -544,38 +704,48 @@ async def get_holidays(
             '$lt': datetime(year + 1, 1, 1)
         }
     
-    holidays = await db.public_holidays.find(query).sort('date', 1).to_list(100)
-    return [PublicHoliday(**holiday) for holiday in holidays]
+    # Mongo already returns dicts; skip per-document Pydantic validation
+    result = await db.public_holidays.find(query, {'_id': 0}).sort('date', 1).to_list(100)
+    cache_set(cache_key, result)
+    return result
 
 # Favorites endpoints
-@api_router.post("/favorites", response_model=Favorite)
+@api_router.post("/favorites")
 async def add_favorite(favorite: FavoriteCreate):
     """Add attraction to favorites"""
-    # Check if already favorited
-    existing = await db.favorites.find_one({
-        'user_id': favorite.user_id,
-        'attraction_id': favorite.attraction_id
-    })
-    
-    if existing:
-        return Favorite(**existing)
-    
-    favorite_obj = Favorite(
-        user_id=favorite.user_id,
-        attraction_id=favorite.attraction_id
+    # One atomic upsert instead of find_one + insert_one: $setOnInsert
+    # only fires when the pair doesn't exist yet, and ReturnDocument.AFTER
+    # hands back whichever document ends up stored. The unique
+    # (user_id, attraction_id) index backs the race-free guarantee.
+    return await db.favorites.find_one_and_update(
+        {'user_id': favorite.user_id, 'attraction_id': favorite.attraction_id},
+        {'$setOnInsert': {
+            '_id': token_urlsafe(16),
+            'created_at': datetime.utcnow()
+        }},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
     )
-    
-    await db.favorites.insert_one(favorite_obj.dict(by_alias=True))
-    return favorite_obj
 
-@api_router.get("/favorites/{user_id}", response_model=List[Attraction])
+@api_router.get("/favorites/{user_id}")
 async def get_user_favorites(user_id: str):
     """Get user's favorite attractions"""
-    favorites = await db.favorites.find({'user_id': user_id}).to_list(1000)
-    attraction_ids = [fav['attraction_id'] for fav in favorites]
-    
-    attractions = await db.attractions.find({'_id': {'$in': attraction_ids}}).to_list(1000)
-    return [Attraction(**attraction) for attraction in attractions]
+    # Server-side join: one round trip instead of favorites + $in queries
+    pipeline = [
+        {'$match': {'user_id': user_id}},
+        {'$lookup': {
+            'from': 'attractions',
+            'localField': 'attraction_id',
+            'foreignField': '_id',
+            'as': 'attraction'
+        }},
+        {'$unwind': '$attraction'},
+        {'$replaceRoot': {'newRoot': '$attraction'}},
+        {'$limit': 1000}
+    ]
+    cursor = await db.favorites.aggregate(pipeline)
+    # Joined docs are already attraction-shaped; hand them to orjson as-is
+    return await cursor.to_list(1000)
 
 @api_router.delete("/favorites/{user_id}/{attraction_id}")
 async def remove_favorite(user_id: str, attraction_id: str):
@@ -595,13 +765,14 @@ async def remove_favorite(user_id: str, attraction_id: str):
 async def health_check():
     """Check if the API and database are healthy"""
     try:
-        # Test database connection
-        await db.command('ping')
-        
-        # Get collection counts
-        attractions_count = await db.attractions.count_documents({})
-        events_count = await db.events.count_documents({})
-        
+        # Ping and counts are independent; estimated_document_count reads
+        # collection metadata instead of scanning documents
+        _, attractions_count, events_count = await asyncio.gather(
+            db.command('ping'),
+            db.attractions.estimated_document_count(),
+            db.events.estimated_document_count()
+        )
+
         return {
             "status": "healthy",
             "database": "connected",
@@ -616,64 +787,41 @@ async def health_check():
             "error": str(e)
         }
 
-# AI Itinerary Generator endpoint
-@api_router.post("/itinerary/generate", response_model=ItineraryResponse)
-async def generate_itinerary(request: ItineraryRequest):
-    """Generate AI-powered personalized itinerary for Sarawak"""
-    try:
-        # Determine user identifier (user_id or IP for guests)
-        user_identifier = request.user_id if request.user_id else "guest"
-        
-        # Check rate limit (5 itineraries per day)
-        today_start = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
-        today_count = await db.itineraries.count_documents({
-            'user_id': user_identifier,
-            'created_at': {'$gte': today_start}
-        })
-        
-        if today_count >= 5:
-            raise HTTPException(
-                status_code=429,
-                detail="Daily limit reached. You can generate up to 5 itineraries per day. Please try again tomorrow."
-            )
-        
-        # Get attractions based on interests
-        query = {}
-        if request.interests and len(request.interests) > 0:
-            query['categories'] = {'$in': request.interests}
-        
-        attractions = await db.attractions.find(query).limit(50).to_list(50)
-        events = await db.events.find({}).limit(20).to_list(20)
-        holidays = await db.public_holidays.find({}).to_list(20)
-        
-        # Prepare context for AI
-        attractions_text = "\n".join([
-            f"- {attr['name']} ({', '.join(attr.get('categories', []))}): {attr.get('location', 'Sarawak')} - {attr.get('description', '')[:100]}"
-            for attr in attractions[:30]
-        ])
-        
-        events_text = "\n".join([
-            f"- {evt['title']}: {evt.get('start_date', 'TBD')} at {evt.get('location_name', 'Sarawak')}"
-            for evt in events[:10]
-        ])
-        
-        holidays_text = "\n".join([
-            f"- {hol['name']}: {hol['date']}"
-            for hol in holidays[:10]
-        ])
-        
-        budget_info = {
-            "low": "Budget-friendly options, local food, public transport, free/affordable attractions",
-            "medium": "Mix of budget and mid-range, some guided tours, comfortable accommodation",
-            "high": "Premium experiences, private tours, luxury dining, exclusive attractions"
-        }
-        
-        # Create AI prompt
-        prompt = f"""You are a professional travel planner for Sarawak, Malaysia. Create a detailed {request.duration}-day itinerary based on the following requirements:
+# Batch endpoint: lets clients pay one network round trip for several
+# read-only probes (the API test suite uses this for its smoke pass)
+@api_router.post("/batch")
+async def batch(request: Request, sub_requests: List[BatchSubRequest]):
+    """Execute up to 20 GET sub-requests in a single round trip"""
+    if len(sub_requests) > 20:
+        raise HTTPException(status_code=400, detail="At most 20 sub-requests per batch")
+
+    async def dispatch(sub: BatchSubRequest):
+        if sub.method.upper() != "GET" or not sub.path.startswith("/"):
+            return {"path": sub.path, "status": 400, "body": "only GET paths are supported"}
+        resp = await request.app.state.self_http.get(f"/api{sub.path}")
+        try:
+            body = orjson.loads(resp.content)
+        except orjson.JSONDecodeError:
+            body = resp.text
+        return {"path": sub.path, "status": resp.status_code, "body": body}
+
+    # Sub-requests are independent, so dispatch them all concurrently
+    return await asyncio.gather(*(dispatch(sub) for sub in sub_requests))
+
+# AI Itinerary Generator endpoints
+
+_BUDGET_INFO = {
+    "low": "Budget-friendly options, local food, public transport, free/affordable attractions",
+    "medium": "Mix of budget and mid-range, some guided tours, comfortable accommodation",
+    "high": "Premium experiences, private tours, luxury dining, exclusive attractions"
+}
 
-**Tourist Interests:** {', '.join(request.interests)}
-**Duration:** {request.duration} days
-**Budget Level:** {request.budget.upper()} - {budget_info.get(request.budget, budget_info['medium'])}
+# Built once at import time; handlers only .format() the dynamic pieces in
+_PROMPT_TEMPLATE = """You are a professional travel planner for Sarawak, Malaysia. Create a detailed {duration}-day itinerary based on the following requirements:
+
+**Tourist Interests:** {interests}
+**Duration:** {duration} days
+**Budget Level:** {budget} - {budget_info}
 
 **Available Attractions in Sarawak:**
 {attractions_text}
@@ -699,55 +847,228 @@ async def generate_itinerary(request: ItineraryRequest):
 
 Format the itinerary in a clear, organized manner with proper headings and bullet points."""
 
-        # Initialize AI chat
-        emergent_key = os.getenv('EMERGENT_LLM_KEY')
-        chat = LlmChat(
-            api_key=emergent_key,
-            session_id=f"itinerary_{uuid.uuid4()}",
-            system_message="You are an expert travel planner specializing in Sarawak, Malaysia tourism."
+
+async def _prepare_itinerary_request(request: ItineraryRequest):
+    """Rate-limit the caller and build the LLM prompt from context data.
+
+    Returns (user_identifier, today_count, prompt, limit_key); raises 429
+    when the daily limit is exhausted. Callers must decrement limit_key
+    if generation fails after this returns, so a transient LLM error does
+    not consume a daily slot.
+    """
+    # Determine user identifier (user_id or IP for guests)
+    user_identifier = request.user_id if request.user_id else "guest"
+
+    # Get attractions based on interests
+    query = {}
+    if request.interests and len(request.interests) > 0:
+        query['categories'] = {'$in': request.interests}
+
+    # Rate limit via an atomic Redis counter instead of counting
+    # itinerary documents in Mongo on every request; the increment and
+    # the cached-context lookup don't depend on each other, so overlap
+    # them. The 429 check happens before any of the expensive work
+    # (Mongo context fetch, LLM call).
+    today = datetime.now(timezone.utc).strftime('%Y-%m-%d')
+    limit_key = f"itinlimit:{user_identifier}:{today}"
+    attractions_key = f"attr:{','.join(sorted(request.interests))}"
+    # Pipeline the increment with the expire so the counter is always
+    # self-cleaning: a crash between separate INCR and EXPIRE calls would
+    # leave an immortal key that rate-limits the user forever
+    pipe = redis_client.pipeline()
+    pipe.incr(limit_key)
+    pipe.expire(limit_key, 86400)
+    (today_count, _), cached = await asyncio.gather(
+        pipe.execute(),
+        redis_client.mget(attractions_key, "events:all", "holidays:all")
+    )
+
+    if today_count > 5:
+        # Undo the increment so rejected attempts don't consume quota
+        await redis_client.decr(limit_key)
+        raise HTTPException(
+            status_code=429,
+            detail="Daily limit reached. You can generate up to 5 itineraries per day. Please try again tomorrow."
         )
-        
-        # Use Gemini Flash for cost-effectiveness
-        chat.with_model("gemini", "gemini-2.5-flash")
-        
-        # Generate itinerary
-        user_message = UserMessage(text=prompt)
-        ai_response = await chat.send_message(user_message)
-        
-        # Create itinerary response
-        itinerary_obj = ItineraryResponse(
-            user_id=user_identifier,
-            itinerary=ai_response,
-            interests=request.interests,
-            duration=request.duration,
-            budget=request.budget
+
+    if all(cached):
+        attractions, events, holidays = (orjson.loads(c) for c in cached)
+    else:
+        # The three context queries are independent; dispatch them
+        # together, projecting down to the fields the prompt uses
+        attractions, events, holidays = await asyncio.gather(
+            db.attractions.find(
+                query,
+                # Normalize missing fields server-side ($ifNull) and truncate
+                # long descriptions so neither crosses the wire
+                {'_id': 0, 'name': 1,
+                 'categories': {'$ifNull': ['$categories', []]},
+                 'location': {'$ifNull': ['$location', 'Sarawak']},
+                 'description': {'$substrCP': [{'$ifNull': ['$description', '']}, 0, 100]}}
+            ).limit(50).to_list(50),
+            db.events.find(
+                {},
+                {'_id': 0, 'title': 1,
+                 'start_date': {'$ifNull': ['$start_date', 'TBD']},
+                 'location_name': {'$ifNull': ['$location_name', 'Sarawak']}}
+            ).limit(20).to_list(20),
+            db.public_holidays.find({}, {'_id': 0, 'name': 1, 'date': 1}).to_list(20)
         )
-        
-        # Save to database
-        await db.itineraries.insert_one(itinerary_obj.dict(by_alias=True))
-        
-        # Add remaining count to response
-        remaining_count = 5 - (today_count + 1)
+        await asyncio.gather(
+            redis_client.set(attractions_key, orjson.dumps(attractions, default=str).decode(), ex=REFERENCE_CACHE_TTL),
+            redis_client.set("events:all", orjson.dumps(events, default=str).decode(), ex=REFERENCE_CACHE_TTL),
+            redis_client.set("holidays:all", orjson.dumps(holidays, default=str).decode(), ex=REFERENCE_CACHE_TTL)
+        )
+    
+    # Prepare context for AI; the projection guarantees every field, so
+    # these are straight lookups fed lazily into join
+    attractions_text = "\n".join(
+        f"- {attr['name']} ({', '.join(attr['categories'])}): {attr['location']} - {attr['description']}"
+        for attr in attractions[:30]
+    )
+    events_text = "\n".join(
+        f"- {evt['title']}: {evt['start_date']} at {evt['location_name']}"
+        for evt in events[:10]
+    )
+    holidays_text = "\n".join(
+        f"- {hol['name']}: {hol['date']}"
+        for hol in holidays[:10]
+    )
+    
+    # Fill the module-level template; only the dynamic pieces are built here
+    prompt = _PROMPT_TEMPLATE.format(
+        duration=request.duration,
+        interests=', '.join(request.interests),
+        budget=request.budget.upper(),
+        budget_info=_BUDGET_INFO.get(request.budget, _BUDGET_INFO['medium']),
+        attractions_text=attractions_text,
+        events_text=events_text,
+        holidays_text=holidays_text
+    )
+
+    return user_identifier, today_count, prompt, limit_key
+
+
+def _new_itinerary_chat() -> LlmChat:
+    """Build an LLM chat session configured for itinerary generation"""
+    chat = LlmChat(
+        api_key=os.getenv('EMERGENT_LLM_KEY'),
+        session_id=f"itinerary_{uuid.uuid4()}",
+        system_message="You are an expert travel planner specializing in Sarawak, Malaysia tourism."
+    )
+    # Use Gemini Flash for cost-effectiveness
+    chat.with_model("gemini", "gemini-2.5-flash")
+    return chat
+
+
+@api_router.post("/itinerary/generate", response_model=ItineraryResponse)
+async def generate_itinerary(request: ItineraryRequest):
+    """Generate AI-powered personalized itinerary for Sarawak"""
+    try:
+        user_identifier, today_count, prompt, limit_key = await _prepare_itinerary_request(request)
+
+        # Generate itinerary
+        chat = _new_itinerary_chat()
+        try:
+            ai_response = await chat.send_message(UserMessage(text=prompt))
+
+            # Create itinerary response
+            itinerary_obj = ItineraryResponse(
+                user_id=user_identifier,
+                itinerary=ai_response,
+                interests=request.interests,
+                duration=request.duration,
+                budget=request.budget
+            )
+
+            # Save to database
+            await db.itineraries.insert_one(itinerary_obj.dict(by_alias=True))
+        except Exception:
+            # Refund the daily slot: the caller gets a 500 and nothing
+            # was stored, so the attempt shouldn't count against the
+            # limit whether the LLM call or the insert failed
+            await redis_client.decr(limit_key)
+            raise
+
+        # Add remaining count to response (today_count already includes
+        # this generation)
+        remaining_count = 5 - today_count
         logging.info(f"Itinerary generated for {user_identifier}. Remaining today: {remaining_count}")
-        
+
         return itinerary_obj
-        
+
     except HTTPException:
         raise
     except Exception as e:
         logging.error(f"Error generating itinerary: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to generate itinerary: {str(e)}")
 
+@api_router.post("/itinerary/generate/stream")
+async def generate_itinerary_stream(request: ItineraryRequest):
+    """Generate an itinerary, streaming LLM output as server-sent events.
+
+    Time-to-first-byte drops from the full generation time (10-30s) to
+    roughly the model's first-token latency; the non-streaming endpoint
+    above keeps its contract for existing clients.
+    """
+    user_identifier, today_count, prompt, limit_key = await _prepare_itinerary_request(request)
+    chat = _new_itinerary_chat()
+    user_message = UserMessage(text=prompt)
+
+    async def event_stream():
+        parts = []
+        try:
+            if hasattr(chat, 'send_message_stream'):
+                async for piece in chat.send_message_stream(user_message):
+                    parts.append(piece)
+                    # JSON-encode so newlines inside a chunk survive SSE framing
+                    yield f"data: {orjson.dumps(piece).decode()}\n\n"
+            else:
+                # Client without a streaming API: deliver in one chunk
+                piece = await chat.send_message(user_message)
+                parts.append(piece)
+                yield f"data: {orjson.dumps(piece).decode()}\n\n"
+        except Exception as e:
+            logging.error(f"Error streaming itinerary: {e}")
+            # Refund the daily slot consumed by this failed generation
+            await redis_client.decr(limit_key)
+            yield f"event: error\ndata: {orjson.dumps(str(e)).decode()}\n\n"
+            return
+
+        itinerary_obj = ItineraryResponse(
+            user_id=user_identifier,
+            itinerary="".join(parts),
+            interests=request.interests,
+            duration=request.duration,
+            budget=request.budget
+        )
+        # Persist before emitting the done event: the id it carries must
+        # refer to a document that actually exists. The itinerary text has
+        # already streamed, so the insert only delays the final event.
+        try:
+            await db.itineraries.insert_one(itinerary_obj.dict(by_alias=True))
+        except Exception as e:
+            logging.error(f"Error saving streamed itinerary: {e}")
+            # Nothing was stored, so refund the slot here too — the
+            # client got the text but can't retrieve it again by id
+            await redis_client.decr(limit_key)
+            yield f"event: error\ndata: {orjson.dumps(str(e)).decode()}\n\n"
+            return
+        logging.info(f"Itinerary streamed for {user_identifier}. Remaining today: {5 - today_count}")
+        yield f"event: done\ndata: {orjson.dumps(itinerary_obj.id).decode()}\n\n"
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
 @api_router.get("/itinerary/limit/{user_id}")
 async def check_itinerary_limit(user_id: str):
     """Check remaining itinerary generation limit for today"""
     try:
-        today_start = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
-        today_count = await db.itineraries.count_documents({
-            'user_id': user_id,
-            'created_at': {'$gte': today_start}
-        })
-        
+        now = datetime.now(timezone.utc)
+        today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        # Read the same counter generate_itinerary increments: one Redis
+        # GET instead of a Mongo count
+        today_count = int(await redis_client.get(f"itinlimit:{user_id}:{now.strftime('%Y-%m-%d')}") or 0)
+
         remaining = max(0, 5 - today_count)
         
         return {
@@ -765,12 +1086,12 @@ async def check_itinerary_limit(user_id: str):
             "error": str(e)
         }
 
-@api_router.get("/itinerary/{user_id}", response_model=List[ItineraryResponse])
+@api_router.get("/itinerary/{user_id}")
 async def get_user_itineraries(user_id: str):
     """Get all itineraries for a user"""
     try:
-        itineraries = await db.itineraries.find({'user_id': user_id}).sort('created_at', -1).to_list(100)
-        return [ItineraryResponse(**itin) for itin in itineraries]
+        # Mongo already returns dicts; skip per-document Pydantic validation
+        return await db.itineraries.find({'user_id': user_id}).sort('created_at', -1).to_list(100)
     except Exception as e:
         logging.error(f"Error fetching itineraries: {e}")
         return []
@@ -778,12 +1099,16 @@ async def get_user_itineraries(user_id: str):
 # Include the router in the main app
 app.include_router(api_router)
 
+# Explicit origin allowlist (comma-separated in CORS_ORIGINS) so browsers
+# can cache preflight responses; the wildcard + credentials combination
+# forced a fresh OPTIONS round trip before most API calls
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
-    allow_origins=["*"],
+    allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    max_age=86400,
 )
 
 # Configure logging
@@ -793,6 +1118,3 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
@@ -0,0 +1,22 @@
+# cython: language_level=3
+"""CPU-side validation helpers for backend_test.
+
+Pure Python and imported as-is; the module carries a cython pragma so the
+hot loops can be compiled ahead of time (`cythonize -i
+backend_test_helpers.py`, or mypyc) when the suite is pointed at large
+payloads or stress-style runs. If a compiled extension is present on the
+path it shadows this file automatically; otherwise the interpreted
+version runs — no fallback wiring needed.
+"""
+
+
+def find_missing_fields(record, required_fields):
+    """Return the required fields absent from record as a set"""
+    return required_fields - record.keys()
+
+
+def check_all_have_category(records, category):
+    """True when every record lists category in its categories"""
+    # `or ()` reuses the empty-tuple singleton instead of building a
+    # fresh list default per row; all() short-circuits on the first miss
+    return all(category in (record.get('categories') or ()) for record in records)